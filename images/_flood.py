@@ -0,0 +1,103 @@
+from array import array
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # fall back to the pure-Python flood fill below
+    njit = None
+
+
+def _flood_bg_py(bg_mask):
+    """Return the pixels of bg_mask reachable from the image edges.
+    Pure-Python 4-directional flood fill for when neither scipy nor numba
+    is installed. Pixels are packed as y*w + x into a preallocated int32
+    queue and a flat bytearray, so no tuples or deque nodes are allocated.
+    """
+    h, w = bg_mask.shape
+    n = w * h
+    mask = np.ascontiguousarray(bg_mask, dtype=np.bool_).tobytes()
+    visited = bytearray(n)
+    # Every pixel is queued at most once, so head/tail never wrap
+    queue = array("i", bytes(4 * n))
+    tail = 0
+
+    # Seed queue with all edge pixels that satisfy background criteria
+    edges = (range(w), range(n - w, n), range(0, n, w), range(w - 1, n, w))
+    for edge in edges:
+        for p in edge:
+            if mask[p] and not visited[p]:
+                visited[p] = 1
+                queue[tail] = p
+                tail += 1
+
+    head = 0
+    while head < tail:
+        p = queue[head]
+        head += 1
+        x = p % w
+        if x + 1 < w and mask[p + 1] and not visited[p + 1]:
+            visited[p + 1] = 1
+            queue[tail] = p + 1
+            tail += 1
+        if x > 0 and mask[p - 1] and not visited[p - 1]:
+            visited[p - 1] = 1
+            queue[tail] = p - 1
+            tail += 1
+        if p + w < n and mask[p + w] and not visited[p + w]:
+            visited[p + w] = 1
+            queue[tail] = p + w
+            tail += 1
+        if p >= w and mask[p - w] and not visited[p - w]:
+            visited[p - w] = 1
+            queue[tail] = p - w
+            tail += 1
+    return np.frombuffer(visited, dtype=np.bool_).reshape(h, w)
+
+
+def _flood_bg_numba(bg_mask):
+    """Return the pixels of bg_mask reachable from the image edges.
+    Compiled 4-directional flood fill, used by crop_whitespace when scipy
+    is not installed. bg_mask is a 2-D boolean array (True = background).
+    """
+    h, w = bg_mask.shape
+    visited = np.zeros((h, w), dtype=np.bool_)
+    stack = np.empty((h * w, 2), dtype=np.int32)
+    top = 0
+
+    # Seed stack with all edge pixels that satisfy background criteria
+    for x in range(w):
+        for y in (0, h - 1):
+            if bg_mask[y, x] and not visited[y, x]:
+                visited[y, x] = True
+                stack[top, 0] = y
+                stack[top, 1] = x
+                top += 1
+    for y in range(h):
+        for x in (0, w - 1):
+            if bg_mask[y, x] and not visited[y, x]:
+                visited[y, x] = True
+                stack[top, 0] = y
+                stack[top, 1] = x
+                top += 1
+
+    while top > 0:
+        top -= 1
+        y = stack[top, 0]
+        x = stack[top, 1]
+        for dy, dx in ((0, 1), (0, -1), (1, 0), (-1, 0)):
+            ny = y + dy
+            nx = x + dx
+            if 0 <= nx < w and 0 <= ny < h and not visited[ny, nx]:
+                if bg_mask[ny, nx]:
+                    visited[ny, nx] = True
+                    stack[top, 0] = ny
+                    stack[top, 1] = nx
+                    top += 1
+    return visited
+
+
+if njit is not None:
+    flood_bg = njit(cache=True, nogil=True)(_flood_bg_numba)
+else:
+    flood_bg = _flood_bg_py
@@ -1,6 +1,14 @@
 from PIL import Image
+import numpy as np
 import os
-from collections import Counter, deque
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from scipy import ndimage
+except ImportError:  # fall back to the numba or pure-Python flood fill
+    ndimage = None
+    from _flood import flood_bg
 
 script_dir = os.path.dirname(os.path.abspath(__file__))
 input_folder = os.path.join(script_dir, "screenshots")  # where your raw screenshots are
@@ -8,10 +16,31 @@ output_folder = os.path.join(script_dir, "cropped_cards")  # where to save proce
 
 # Tolerance for considering a pixel part of the background (0-255 per channel)
 TOLERANCE = 15
+# Screenshots whose longest side reaches this size are flood filled on a
+# 1/DOWNSAMPLE background mask; the result is scaled back up for cropping
+DOWNSAMPLE_MIN_SIZE = 2000
+DOWNSAMPLE = 2
+IMAGE_EXTS = (".png", ".jpg", ".jpeg")
 os.makedirs(output_folder, exist_ok=True)
 
 # Collect already processed (without extension differences)
-existing_outputs = {os.path.splitext(f)[0].lower() for f in os.listdir(output_folder) if f.lower().endswith(".png")}
+with os.scandir(output_folder) as entries:
+    existing_outputs = {
+        os.path.splitext(name)[0] for name in (e.name.lower() for e in entries) if name.endswith(".png")
+    }
+
+def edge_connected(bg_mask):
+    """Return the part of bg_mask that is 4-connected to the image edges."""
+    if ndimage is None:
+        return flood_bg(bg_mask)
+    # Label 4-connected background regions; those touching an edge are what
+    # a flood fill seeded from the border would reach.
+    labels, _ = ndimage.label(bg_mask)
+    border_labels = np.unique(np.concatenate(
+        (labels[0], labels[-1], labels[:, 0], labels[:, -1])
+    ))
+    border_labels = border_labels[border_labels != 0]
+    return np.isin(labels, border_labels)
 
 def remove_background(img, tol=TOLERANCE):
     """Make only edge-connected uniform/light background transparent.
@@ -22,17 +51,18 @@ def remove_background(img, tol=TOLERANCE):
       3. Only pixels reached by flood fill become transparent.
       4. Crop resulting transparent border.
     """
-    rgb = img.convert("RGB")
-    w, h = rgb.size
+    # Convert once and work on a single H x W x 4 array from here on
+    arr = np.array(img.convert("RGBA"))
+    h, w = arr.shape[:2]
 
     def is_near_white(pixel):
         return all(channel >= 255 - tol for channel in pixel[:3])
 
     corner_pixels = [
-        rgb.getpixel((0, 0)),
-        rgb.getpixel((w - 1, 0)),
-        rgb.getpixel((0, h - 1)),
-        rgb.getpixel((w - 1, h - 1)),
+        tuple(arr[0, 0, :3].tolist()),
+        tuple(arr[0, -1, :3].tolist()),
+        tuple(arr[-1, 0, :3].tolist()),
+        tuple(arr[-1, -1, :3].tolist()),
     ]
     # Only treat near-white corners as background candidates
     bg_candidates = {p for p in corner_pixels if is_near_white(p)}
@@ -41,89 +71,99 @@ def remove_background(img, tol=TOLERANCE):
     if not bg_candidates:
         return None
 
-    rgba = rgb.convert("RGBA")
-    pixels = rgba.load()
-
-    def is_bg(pixel):
-        # Corner-based near-white candidates
-        for bg in bg_candidates:
-            if all(abs(pixel[i] - bg[i]) <= tol for i in range(3)):
-                return True
-        # General near-white heuristic as fallback
-        if is_near_white(pixel):
-            return True
-        return False
-
-    visited = [[False]*w for _ in range(h)]
-    q = deque()
-
-    def enqueue_if_bg(x, y):
-        if 0 <= x < w and 0 <= y < h and not visited[y][x]:
-            if is_bg(pixels[x, y]):
-                visited[y][x] = True
-                q.append((x, y))
-
-    # Seed queue with all edge pixels that satisfy background criteria
-    for x in range(w):
-        enqueue_if_bg(x, 0)
-        enqueue_if_bg(x, h-1)
-    for y in range(h):
-        enqueue_if_bg(0, y)
-        enqueue_if_bg(w-1, y)
-
-    # 4-directional flood fill (use 8 if needed)
-    while q:
-        x, y = q.popleft()
-        for nx, ny in ((x+1,y), (x-1,y), (x,y+1), (x,y-1)):
-            if 0 <= nx < w and 0 <= ny < h and not visited[ny][nx]:
-                if is_bg(pixels[nx, ny]):
-                    visited[ny][nx] = True
-                    q.append((nx, ny))
-
-    # Apply transparency only to visited (edge-connected background) pixels
-    for y in range(h):
-        for x in range(w):
-            if visited[y][x]:
-                r, g, b, a = pixels[x, y]
-                pixels[x, y] = (r, g, b, 0)
-
-    # Trim transparent border
-    alpha = rgba.split()[-1]
-    bbox = alpha.getbbox()
-    if bbox:
-        rgba = rgba.crop(bbox)
-    return rgba
+    # Background = near-white (even the darkest channel is light) or within
+    # tolerance of one of the corner background candidates
+    near_white = arr[..., :3].min(axis=-1) >= 255 - tol
+    rgb = arr[..., :3].astype(np.int16)
+    bg_mask = near_white
+    for bg in sorted(bg_candidates):
+        bg_mask |= np.abs(rgb - np.array(bg, dtype=np.int16)).max(axis=-1) <= tol
+
+    scale = DOWNSAMPLE if max(w, h) >= DOWNSAMPLE_MIN_SIZE else 1
+    if scale == 1:
+        visited = edge_connected(bg_mask)
+    else:
+        # Flood fill large screenshots on a smaller mask where a block counts
+        # as background only if all of its pixels do, so thin outlines still
+        # stop the fill and card pixels are never cleared. Odd edges are
+        # padded with background and trimmed again after upsampling.
+        h2, w2 = -(-h // scale), -(-w // scale)
+        padded = np.pad(bg_mask, ((0, h2 * scale - h), (0, w2 * scale - w)), constant_values=True)
+        small = padded.reshape(h2, scale, w2, scale).all(axis=(1, 3))
+        visited = edge_connected(small)
+        visited = visited.repeat(scale, axis=0).repeat(scale, axis=1)[:h, :w] & bg_mask
+        # Background pixels in blocks that also hold card pixels were left
+        # out; grow into them one step at a time, staying inside bg_mask
+        for _ in range(scale - 1):
+            grown = visited.copy()
+            grown[1:] |= visited[:-1]
+            grown[:-1] |= visited[1:]
+            grown[:, 1:] |= visited[:, :-1]
+            grown[:, :-1] |= visited[:, 1:]
+            visited = grown & bg_mask
+
+    # Apply transparency only to visited (edge-connected background) pixels;
+    # everything else is opaque, as the source alpha was never considered
+    arr[..., 3] = 255
+    arr[visited, 3] = 0
+
+    # Trim transparent border: every non-visited pixel is still opaque, so the
+    # bbox comes straight from the mask instead of re-scanning the alpha channel
+    keep = ~visited
+    rows = np.flatnonzero(keep.any(axis=1))
+    cols = np.flatnonzero(keep.any(axis=0))
+    if rows.size:
+        arr = arr[rows[0]:rows[-1] + 1, cols[0]:cols[-1] + 1]
+    return Image.fromarray(arr, "RGBA")
+
+def _process_one(filename):
+    """Remove the background from one screenshot and save it as PNG.
+    Returns "processed", "no_bg" or "failed" for the summary tally.
+    """
+    stem = os.path.splitext(filename)[0].lower()
+    path = os.path.join(input_folder, filename)
+    try:
+        with Image.open(path) as img:
+            processed = remove_background(img)
+        if processed is None:
+            return "no_bg"
+        out_name = stem + ".png"
+        processed.save(os.path.join(output_folder, out_name))
+        return "processed"
+    except Exception as e:
+        print(f"⚠️ Failed processing {filename}: {e}")
+        return "failed"
 
 # Force reprocess (ignore cache) if environment variable CROP_FORCE=1
 force = os.environ.get("CROP_FORCE") == "1"
 
-if not os.path.isdir(input_folder):
-    print(f"❌ Input folder not found: {input_folder}")
-else:
-    files_processed = 0
-    files_skipped = 0
-    files_skipped_no_bg = 0
-    for filename in os.listdir(input_folder):
-        if filename.lower().endswith((".png", ".jpg", ".jpeg")):
-            stem = os.path.splitext(filename)[0].lower()
-            if stem in existing_outputs and not force:
-                files_skipped += 1
-                continue
-            path = os.path.join(input_folder, filename)
-            try:
-                img = Image.open(path)
-                processed = remove_background(img)
-                if processed is None:
-                    files_skipped_no_bg += 1
-                    continue
-                out_name = stem + ".png"
-                processed.save(os.path.join(output_folder, out_name))
-                files_processed += 1
-            except Exception as e:
-                print(f"⚠️ Failed processing {filename}: {e}")
-    if files_processed:
-        print(f"✅ Background removal complete. {files_processed} new file(s) saved to '{output_folder}'.")
-    print(f"ℹ️ Skipped {files_skipped} existing file(s). Use CROP_FORCE=1 to reprocess all.")
-    print(f"ℹ️ Skipped {files_skipped_no_bg} file(s) with no near-white border.")
-    if files_processed == 0 and files_skipped == 0 and files_skipped_no_bg == 0:
-        print("ℹ️ No image files processed.")
+if __name__ == "__main__":
+    if not os.path.isdir(input_folder):
+        print(f"❌ Input folder not found: {input_folder}")
+    else:
+        files_skipped = 0
+        files = []
+        with os.scandir(input_folder) as entries:
+            for entry in entries:
+                name_lower = entry.name.lower()
+                if name_lower.endswith(IMAGE_EXTS):
+                    stem = os.path.splitext(name_lower)[0]
+                    if stem in existing_outputs and not force:
+                        files_skipped += 1
+                        continue
+                    files.append(entry.name)
+
+        # Each image is independent and CPU-bound, so fan out across processes
+        tally = Counter()
+        with ProcessPoolExecutor() as ex:
+            for result in ex.map(_process_one, files, chunksize=4):
+                tally[result] += 1
+        files_processed = tally["processed"]
+        files_skipped_no_bg = tally["no_bg"]
+
+        if files_processed:
+            print(f"✅ Background removal complete. {files_processed} new file(s) saved to '{output_folder}'.")
+        print(f"ℹ️ Skipped {files_skipped} existing file(s). Use CROP_FORCE=1 to reprocess all.")
+        print(f"ℹ️ Skipped {files_skipped_no_bg} file(s) with no near-white border.")
+        if files_processed == 0 and files_skipped == 0 and files_skipped_no_bg == 0:
+            print("ℹ️ No image files processed.")